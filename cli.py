@@ -7,12 +7,19 @@ Usage:
     # Extract raw text only from all PDFs in bg_rules/
     python cli.py --extract-only
     python cli.py --extract-only --bg-rules-dir path/to/pdfs --output-rules-dir path/to/output
+
+    # Same, but append texts to a packed archive (corpus.pack + corpus.idx)
+    python cli.py --extract-only --pack
+
+    # List documents of the packed archive containing a word
+    python cli.py --search "wagon" --pack
 """
 
 import argparse
 import os
 import sys
 
+from src.archive import ArchiveTextes, STATUT_ALIAS, STATUT_ARCHIVE, STATUT_VIDE
 from src.extractor import extraire_texte_pdf
 
 
@@ -48,6 +55,18 @@ def parse_args() -> argparse.Namespace:
         dest="output_rules_dir",
         help="Dossier de sortie pour le texte extrait (défaut : output_rules/)",
     )
+    parser.add_argument(
+        "--pack",
+        action="store_true",
+        help="Utiliser l'archive compressée corpus.pack/corpus.idx de --output-rules-dir "
+        "au lieu de fichiers .txt séparés",
+    )
+    parser.add_argument(
+        "--search",
+        default=None,
+        metavar="MOTIF",
+        help="Lister les documents de l'archive (--pack) contenant MOTIF",
+    )
     parser.add_argument(
         "--minio",
         action="store_true",
@@ -82,8 +101,12 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def batch_extract(bg_rules_dir: str, output_rules_dir: str) -> None:
-    """Extract raw text from all PDFs in bg_rules_dir and save as .txt in output_rules_dir."""
+def batch_extract(bg_rules_dir: str, output_rules_dir: str, pack: bool = False) -> None:
+    """Extract raw text from all PDFs in bg_rules_dir and save as .txt in output_rules_dir.
+
+    With pack=True, texts are appended to the packed archive in output_rules_dir
+    instead, and PDFs whose SHA-256 is already archived are not re-extracted.
+    """
     if not os.path.isdir(bg_rules_dir):
         print(f"[Erreur] Dossier introuvable : {bg_rules_dir}", file=sys.stderr)
         sys.exit(1)
@@ -96,23 +119,39 @@ def batch_extract(bg_rules_dir: str, output_rules_dir: str) -> None:
         return
 
     print(f"[Extraction] {len(pdfs)} PDF(s) trouvé(s) dans {bg_rules_dir}")
-    ok, errors = 0, []
+    ok, errors, vides = 0, [], []
+    archive = ArchiveTextes(output_rules_dir) if pack else None
 
     for filename in sorted(pdfs):
         pdf_path = os.path.join(bg_rules_dir, filename)
         nom = os.path.splitext(filename)[0]
         output_path = os.path.join(output_rules_dir, f"{nom}.txt")
 
-        if os.path.isfile(output_path):
+        if archive is None and os.path.isfile(output_path):
             print(f"  → {filename} ... skipped (already extracted)")
             ok += 1
             continue
 
         print(f"  → {filename} ...", end=" ", flush=True)
         try:
-            texte = extraire_texte_pdf(pdf_path)
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(texte)
+            if archive is not None:
+                _, statut = archive.obtenir(pdf_path, nom, extraire_texte_pdf)
+                if statut == STATUT_VIDE:
+                    print("vide (non archivé)")
+                    vides.append(filename)
+                    continue
+                if statut == STATUT_ARCHIVE:
+                    print("skipped (already extracted)")
+                    ok += 1
+                    continue
+                if statut == STATUT_ALIAS:
+                    print("alias (contenu identique déjà archivé)")
+                    ok += 1
+                    continue
+            else:
+                texte = extraire_texte_pdf(pdf_path)
+                with open(output_path, "w", encoding="utf-8") as f:
+                    f.write(texte)
             print("OK")
             ok += 1
         except Exception as e:
@@ -120,16 +159,41 @@ def batch_extract(bg_rules_dir: str, output_rules_dir: str) -> None:
             errors.append(filename)
 
     print(f"\n=== Extraction terminée : {ok}/{len(pdfs)} réussie(s) ===")
-    print(f"Sorties : {output_rules_dir}/")
+    if archive is not None:
+        print(f"Sorties : {archive.chemin_donnees} ({len(archive)} document(s))")
+        archive.fermer()
+    else:
+        print(f"Sorties : {output_rules_dir}/")
+    if vides:
+        print(f"[Vides] Aucun texte extrait, non archivé(s) : {', '.join(vides)}", file=sys.stderr)
     if errors:
         print(f"[Erreurs] {', '.join(errors)}", file=sys.stderr)
 
 
+def search_pack(output_rules_dir: str, motif: str) -> None:
+    """Print the names of archived documents whose text contains motif."""
+    with ArchiveTextes(output_rules_dir) as archive:
+        if not len(archive):
+            print(f"[Erreur] Archive vide ou introuvable : {archive.chemin_donnees}", file=sys.stderr)
+            sys.exit(1)
+        resultats = [nom for nom, _ in archive.rechercher(motif)]
+    print(f"[Recherche] {len(resultats)} document(s) contenant « {motif} »")
+    for nom in resultats:
+        print(f"  → {nom}")
+
+
 def main() -> None:
     args = parse_args()
 
+    if args.search is not None:
+        if not args.pack:
+            print("[Erreur] --search nécessite --pack.", file=sys.stderr)
+            sys.exit(1)
+        search_pack(args.output_rules_dir, args.search)
+        return
+
     if args.extract_only:
-        batch_extract(args.bg_rules_dir, args.output_rules_dir)
+        batch_extract(args.bg_rules_dir, args.output_rules_dir, pack=args.pack)
         return
 
     from src.workflow import executer_workflow, sauvegarder_markdown
@@ -148,12 +212,22 @@ def main() -> None:
     chemin_sortie = args.output or os.path.join("outputs", f"{nom_jeu}.md")
 
     # Run pipeline
-    resultats = executer_workflow(
-        args.pdf,
-        temperature_extraction=args.temperature_extraction,
-        temperature_creation=args.temperature_creation,
-        num_gpu=args.num_gpu,
-    )
+    if args.pack:
+        with ArchiveTextes(args.output_rules_dir) as archive:
+            resultats = executer_workflow(
+                args.pdf,
+                temperature_extraction=args.temperature_extraction,
+                temperature_creation=args.temperature_creation,
+                num_gpu=args.num_gpu,
+                archive=archive,
+            )
+    else:
+        resultats = executer_workflow(
+            args.pdf,
+            temperature_extraction=args.temperature_extraction,
+            temperature_creation=args.temperature_creation,
+            num_gpu=args.num_gpu,
+        )
 
     # Save to disk
     sauvegarder_markdown(resultats["sortie_complete"], chemin_sortie)
@@ -0,0 +1,309 @@
+"""
+Packed Text Archive
+Stores extracted rulebook texts in a single append-only, compressed file
+instead of one small .txt per PDF, so the corpus is cheap to list, copy,
+sync to Minio and version with DVC.
+
+On-disk layout (inside the archive directory):
+    corpus.pack : concatenated zlib-compressed UTF-8 texts (append-only)
+    corpus.idx  : one JSON line per document —
+                  {"sha256", "nom", "offset", "taille", "taille_brute"}
+    corpus.lock : empty file used as an advisory write lock (not versioned)
+
+Data is fsynced before its index line is written (and fsynced), so an
+interrupted append leaves at worst unreferenced bytes at the end of
+corpus.pack. Before each append, an unparseable trailing index line is cut
+off, and a valid one missing its final newline gets it back. Index entries
+pointing past the end of corpus.pack (e.g. a stale pack synced next to a
+newer index) are dropped on load with a warning, so obtenir() re-extracts
+those documents.
+
+Several processes may append to the same directory: each append holds an
+exclusive lock on corpus.lock while writing the data and its index line.
+
+Identical sources stored under several names share the same bytes: each
+name gets its own index line pointing at the same offset.
+
+Usage:
+    from src.archive import ArchiveTextes
+    with ArchiveTextes("output_rules") as archive:
+        texte, statut = archive.obtenir("regles.pdf", "regles", extraire_texte_pdf)
+        texte = archive.lire_par_nom("regles")
+"""
+
+import contextlib
+import hashlib
+import json
+import mmap
+import os
+import sys
+import zlib
+from typing import Callable, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+FICHIER_DONNEES = "corpus.pack"
+FICHIER_INDEX = "corpus.idx"
+FICHIER_VERROU = "corpus.lock"
+
+# Status values returned by ArchiveTextes.obtenir()
+STATUT_ARCHIVE = "archive"  # same name and hash already stored
+STATUT_ALIAS = "alias"      # hash stored under another name; new name indexed
+STATUT_EXTRAIT = "extrait"  # freshly extracted and appended
+STATUT_VIDE = "vide"        # extraction returned no text; nothing stored
+
+
+def empreinte_fichier(chemin: str) -> str:
+    """Return the SHA-256 hex digest of a file, read in 1 MiB chunks."""
+    h = hashlib.sha256()
+    with open(chemin, "rb") as f:
+        for bloc in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+class ArchiveTextes:
+    """Append-only packed archive of extracted texts, indexed by hash and name.
+
+    Reads go through a memory map of corpus.pack, so fetching one document
+    only touches its own compressed bytes. When a name is appended several
+    times, the most recent entry wins.
+    """
+
+    def __init__(self, dossier: str):
+        self.dossier = dossier
+        self.chemin_donnees = os.path.join(dossier, FICHIER_DONNEES)
+        self.chemin_index = os.path.join(dossier, FICHIER_INDEX)
+        self.chemin_verrou = os.path.join(dossier, FICHIER_VERROU)
+        self._par_empreinte: dict = {}
+        self._par_nom: dict = {}
+        self._mmap: Optional[mmap.mmap] = None
+        self._taille_mmap = 0
+        self._charger_index()
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+
+    def _charger_index(self) -> None:
+        """Load corpus.idx, skipping unparseable lines and entries beyond corpus.pack."""
+        if not os.path.isfile(self.chemin_index):
+            return
+        taille_pack = (
+            os.path.getsize(self.chemin_donnees) if os.path.isfile(self.chemin_donnees) else 0
+        )
+        ignorees = 0
+        with open(self.chemin_index, "r", encoding="utf-8") as f:
+            for ligne in f:
+                try:
+                    entree = json.loads(ligne)
+                except json.JSONDecodeError:
+                    continue
+                if entree["offset"] + entree["taille"] > taille_pack:
+                    ignorees += 1
+                    continue
+                self._indexer(entree)
+        if ignorees:
+            print(
+                f"[Archive] {ignorees} entrée(s) de {self.chemin_index} dépassent la fin de "
+                f"{self.chemin_donnees} ({taille_pack} octets) : ignorées, elles seront ré-extraites.",
+                file=sys.stderr,
+            )
+
+    @contextlib.contextmanager
+    def _verrou(self):
+        """Hold an exclusive advisory lock on corpus.lock for the duration of a write."""
+        os.makedirs(self.dossier, exist_ok=True)
+        with open(self.chemin_verrou, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _reparer_index(self) -> None:
+        """Make corpus.idx end with a newline before appending (caller holds the lock).
+
+        A trailing line that parses is kept and terminated; one that does not
+        (an interrupted write) is truncated.
+        """
+        if not os.path.isfile(self.chemin_index):
+            return
+        with open(self.chemin_index, "r+b") as f:
+            taille = f.seek(0, os.SEEK_END)
+            if taille == 0:
+                return
+            f.seek(taille - 1)
+            if f.read(1) == b"\n":
+                return
+            f.seek(0)
+            contenu = f.read()
+            debut = contenu.rfind(b"\n") + 1
+            try:
+                json.loads(contenu[debut:].decode("utf-8"))
+                f.write(b"\n")
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                f.truncate(debut)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _ecrire_entree(self, entree: dict) -> None:
+        """Append one index line (caller holds the lock)."""
+        self._reparer_index()
+        with open(self.chemin_index, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entree, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._indexer(entree)
+
+    def _indexer(self, entree: dict) -> None:
+        self._par_empreinte[entree["sha256"]] = entree
+        self._par_nom[entree["nom"]] = entree
+
+    def __len__(self) -> int:
+        return len(self._par_nom)
+
+    def __contains__(self, nom: str) -> bool:
+        return nom in self._par_nom
+
+    def noms(self) -> list:
+        """Return the sorted list of document names in the archive."""
+        return sorted(self._par_nom)
+
+    def contient_empreinte(self, empreinte: str) -> bool:
+        """Return True if a document extracted from this source hash exists."""
+        return empreinte in self._par_empreinte
+
+    def offset(self, nom: str) -> int:
+        """Return the position of `nom`'s compressed bytes in corpus.pack (KeyError if absent)."""
+        return self._par_nom[nom]["offset"]
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def ajouter(self, nom: str, texte: str, empreinte: str) -> dict:
+        """Append a document to the archive and return its index entry.
+
+        Args:
+            nom:       Document name (PDF file name without extension).
+            texte:     Extracted raw text.
+            empreinte: SHA-256 of the source PDF (see empreinte_fichier).
+        """
+        brut = texte.encode("utf-8")
+        compresse = zlib.compress(brut, 6)
+
+        with self._verrou():
+            with open(self.chemin_donnees, "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(compresse)
+                f.flush()
+                os.fsync(f.fileno())
+
+            entree = {
+                "sha256": empreinte,
+                "nom": nom,
+                "offset": offset,
+                "taille": len(compresse),
+                "taille_brute": len(brut),
+            }
+            self._ecrire_entree(entree)
+        return entree
+
+    def ajouter_alias(self, nom: str, empreinte: str) -> dict:
+        """Index `nom` against the bytes already stored for `empreinte`, without copying them."""
+        entree = dict(self._par_empreinte[empreinte], nom=nom)
+        with self._verrou():
+            self._ecrire_entree(entree)
+        return entree
+
+    def obtenir(
+        self, chemin_pdf: str, nom: str, extraire: Callable[[str], str]
+    ) -> Tuple[str, str]:
+        """Return the text of a PDF, reusing the archive whenever possible.
+
+        The PDF is hashed; if that hash is already stored (under any name) the
+        stored text is returned and `nom` is indexed against it. Otherwise
+        `extraire(chemin_pdf)` is called and its result appended, unless empty,
+        so failed extractions are retried on the next run.
+
+        Returns:
+            (texte, statut) — statut is one of STATUT_ARCHIVE, STATUT_ALIAS,
+            STATUT_EXTRAIT or STATUT_VIDE.
+        """
+        empreinte = empreinte_fichier(chemin_pdf)
+        if self.contient_empreinte(empreinte):
+            entree = self._par_nom.get(nom)
+            statut = STATUT_ARCHIVE
+            if entree is None or entree["sha256"] != empreinte:
+                self.ajouter_alias(nom, empreinte)
+                statut = STATUT_ALIAS
+            return self.lire_par_empreinte(empreinte), statut
+
+        texte = extraire(chemin_pdf)
+        if not texte:
+            return texte, STATUT_VIDE
+        self.ajouter(nom, texte, empreinte)
+        return texte, STATUT_EXTRAIT
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _lire_entree(self, entree: dict) -> str:
+        fin = entree["offset"] + entree["taille"]
+        if self._mmap is None or fin > self._taille_mmap:
+            self._remapper()
+        donnees = self._mmap[entree["offset"]:fin]
+        return zlib.decompress(donnees).decode("utf-8")
+
+    def _remapper(self) -> None:
+        """(Re)open the memory map so it covers data appended since the last read."""
+        self.fermer()
+        with open(self.chemin_donnees, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._taille_mmap = len(self._mmap)
+
+    def lire_par_nom(self, nom: str) -> str:
+        """Return the text stored under `nom` (KeyError if absent)."""
+        return self._lire_entree(self._par_nom[nom])
+
+    def lire_par_empreinte(self, empreinte: str) -> str:
+        """Return the text extracted from the source with this SHA-256 (KeyError if absent)."""
+        return self._lire_entree(self._par_empreinte[empreinte])
+
+    def iterer(self) -> Iterator[tuple]:
+        """Yield (nom, texte) for every document, in name order."""
+        for nom in self.noms():
+            yield nom, self.lire_par_nom(nom)
+
+    def rechercher(self, motif: str) -> Iterator[tuple]:
+        """Yield (nom, texte) for documents containing `motif` (case-insensitive)."""
+        motif = motif.lower()
+        for nom, texte in self.iterer():
+            if motif in texte.lower():
+                yield nom, texte
+
+    def fermer(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+            self._taille_mmap = 0
+
+    def __enter__(self) -> "ArchiveTextes":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fermer()
@@ -10,6 +10,8 @@ Usage:
 """
 
 import os
+from typing import Optional
+from src.archive import ArchiveTextes, STATUT_ALIAS, STATUT_ARCHIVE
 from src.extractor import extraire_texte_pdf
 from src.analyzer import construire_llm, extraire_et_structurer, analyser_mecaniques
 from src.generator import generer_variantes
@@ -20,6 +22,7 @@ def executer_workflow(
     temperature_extraction: float = 0.2,  # More deterministic for factual extraction
     temperature_creation: float = 0.7,    # More creative for variant generation
     num_gpu: int = 1,                      # Offload all layers to RTX 4070 Ti
+    archive: Optional[ArchiveTextes] = None,
 ) -> dict:
     """Run the full pipeline on a PDF of board game rules.
 
@@ -31,6 +34,9 @@ def executer_workflow(
         temperature_extraction:  LLM temperature for extraction/analysis steps.
         temperature_creation:    LLM temperature for variant generation step.
         num_gpu:                 GPU layers (1 = full offload, maximises RTX VRAM).
+        archive:                 Optional packed text archive; if it already holds
+                                 this PDF (by SHA-256) the stored text is reused,
+                                 otherwise the fresh extraction is appended to it.
 
     Returns:
         dict with keys:
@@ -42,7 +48,7 @@ def executer_workflow(
     """
 
     print("[1/4] Extraction du texte PDF...")
-    texte_brut = extraire_texte_pdf(chemin_pdf)
+    texte_brut = _texte_brut(chemin_pdf, archive)
     if not texte_brut:
         raise ValueError(f"Impossible d'extraire du texte depuis : {chemin_pdf}")
 
@@ -70,6 +76,18 @@ def executer_workflow(
     }
 
 
+def _texte_brut(chemin_pdf: str, archive: Optional[ArchiveTextes]) -> str:
+    """Return the PDF text, served from the packed archive when available."""
+    if archive is None:
+        return extraire_texte_pdf(chemin_pdf)
+
+    nom = os.path.splitext(os.path.basename(chemin_pdf))[0]
+    texte, statut = archive.obtenir(chemin_pdf, nom, extraire_texte_pdf)
+    if statut in (STATUT_ARCHIVE, STATUT_ALIAS):
+        print("      (texte lu depuis l'archive)")
+    return texte
+
+
 def _assembler_sortie(regles: str, analyse: str, variantes: str) -> str:
     """Concatenate all sections into a single Markdown document."""
     return f"{regles}\n\n---\n\n{analyse}\n\n---\n\n## Variantes créatives\n\n{variantes}\n"
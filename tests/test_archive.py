@@ -0,0 +1,158 @@
+import pytest
+
+from src.archive import (
+    ArchiveTextes,
+    FICHIER_DONNEES,
+    FICHIER_INDEX,
+    STATUT_ALIAS,
+    STATUT_ARCHIVE,
+    STATUT_EXTRAIT,
+    STATUT_VIDE,
+)
+
+
+def _pdf(tmp_path, nom, contenu):
+    chemin = tmp_path / f"{nom}.pdf"
+    chemin.write_bytes(contenu)
+    return str(chemin)
+
+
+@pytest.fixture
+def dossier(tmp_path):
+    return str(tmp_path / "output_rules")
+
+
+def test_ajouter_puis_lire_par_nom_et_empreinte(dossier):
+    with ArchiveTextes(dossier) as archive:
+        archive.ajouter("catan", "Règles de Catan", "h1")
+        assert archive.lire_par_nom("catan") == "Règles de Catan"
+        assert archive.lire_par_empreinte("h1") == "Règles de Catan"
+        with pytest.raises(KeyError):
+            archive.lire_par_nom("absent")
+
+
+def test_ajout_apres_lecture_remappe(dossier):
+    with ArchiveTextes(dossier) as archive:
+        archive.ajouter("a", "premier", "h1")
+        assert archive.lire_par_nom("a") == "premier"
+        archive.ajouter("b", "second" * 50, "h2")
+        assert archive.lire_par_nom("b") == "second" * 50
+        assert archive.lire_par_nom("a") == "premier"
+
+
+def test_reouverture(dossier):
+    with ArchiveTextes(dossier) as archive:
+        archive.ajouter("a", "texte a", "h1")
+        archive.ajouter("a", "texte a v2", "h2")
+        archive.ajouter("b", "texte b", "h3")
+
+    with ArchiveTextes(dossier) as archive:
+        assert archive.noms() == ["a", "b"]
+        assert archive.lire_par_nom("a") == "texte a v2"
+        assert archive.lire_par_empreinte("h1") == "texte a"
+
+
+def test_ligne_index_tronquee(dossier):
+    with ArchiveTextes(dossier) as archive:
+        for i in range(3):
+            archive.ajouter(f"doc{i}", f"texte {i}", f"h{i}")
+    with open(f"{dossier}/{FICHIER_INDEX}", "a", encoding="utf-8") as f:
+        f.write('{"sha256": "h4", "no')
+
+    with ArchiveTextes(dossier) as archive:
+        assert len(archive) == 3
+        archive.ajouter("w", "texte w", "hw")
+
+    with ArchiveTextes(dossier) as archive:
+        assert len(archive) == 4
+        assert archive.lire_par_nom("w") == "texte w"
+
+
+def test_derniere_ligne_index_valide_sans_retour(dossier):
+    with ArchiveTextes(dossier) as archive:
+        archive.ajouter("a", "texte a", "ha")
+        archive.ajouter("b", "texte b", "hb")
+    chemin_index = f"{dossier}/{FICHIER_INDEX}"
+    with open(chemin_index, "rb+") as f:
+        f.truncate(f.seek(0, 2) - 1)
+
+    with ArchiveTextes(dossier) as archive:
+        assert archive.noms() == ["a", "b"]
+        archive.ajouter("c", "texte c", "hc")
+
+    with ArchiveTextes(dossier) as archive:
+        assert archive.noms() == ["a", "b", "c"]
+        assert archive.lire_par_nom("b") == "texte b"
+
+
+def test_index_depasse_le_pack(tmp_path, dossier, capsys):
+    with ArchiveTextes(dossier) as archive:
+        archive.ajouter("a", "texte a", "ha")
+        archive.ajouter("b", "texte b" * 20, "hb")
+    pack = tmp_path / "output_rules" / FICHIER_DONNEES
+    with ArchiveTextes(dossier) as archive:
+        debut_b = archive.offset("b")
+    with open(pack, "rb+") as f:
+        f.truncate(debut_b + 3)
+
+    pdf_b = _pdf(tmp_path, "b", b"%PDF b")
+    with ArchiveTextes(dossier) as archive:
+        assert archive.noms() == ["a"]
+        assert "corpus.pack" in capsys.readouterr().err
+        assert archive.obtenir(pdf_b, "b", lambda _: "texte b") == ("texte b", STATUT_EXTRAIT)
+
+    with ArchiveTextes(dossier) as archive:
+        assert archive.noms() == ["a", "b"]
+        assert archive.lire_par_nom("b") == "texte b"
+
+
+def test_pack_absent(tmp_path, dossier):
+    with ArchiveTextes(dossier) as archive:
+        archive.ajouter("a", "texte a", "ha")
+    (tmp_path / "output_rules" / FICHIER_DONNEES).unlink()
+
+    with ArchiveTextes(dossier) as archive:
+        assert len(archive) == 0
+
+
+def test_contenu_identique_sous_deux_noms(tmp_path, dossier):
+    appels = []
+
+    def extraire(chemin):
+        appels.append(chemin)
+        return "Règles communes"
+
+    pdf_a = _pdf(tmp_path, "jeu_a", b"%PDF meme contenu")
+    pdf_b = _pdf(tmp_path, "jeu_b", b"%PDF meme contenu")
+
+    pack = tmp_path / "output_rules" / FICHIER_DONNEES
+
+    with ArchiveTextes(dossier) as archive:
+        archive.ajouter("autre", "Autre jeu", "h0")
+        assert archive.obtenir(pdf_a, "jeu_a", extraire) == ("Règles communes", STATUT_EXTRAIT)
+        taille_pack = pack.stat().st_size
+        assert archive.obtenir(pdf_b, "jeu_b", extraire) == ("Règles communes", STATUT_ALIAS)
+        assert archive.obtenir(pdf_b, "jeu_b", extraire) == ("Règles communes", STATUT_ARCHIVE)
+    assert appels == [pdf_a]
+    assert pack.stat().st_size == taille_pack
+
+    with ArchiveTextes(dossier) as archive:
+        assert archive.noms() == ["autre", "jeu_a", "jeu_b"]
+        assert archive.offset("jeu_b") == archive.offset("jeu_a")
+        assert archive.lire_par_nom("jeu_b") == "Règles communes"
+
+
+def test_texte_vide_non_archive(tmp_path, dossier):
+    pdf = _pdf(tmp_path, "scan", b"%PDF image seule")
+    with ArchiveTextes(dossier) as archive:
+        assert archive.obtenir(pdf, "scan", lambda _: "") == ("", STATUT_VIDE)
+        assert len(archive) == 0
+        assert archive.obtenir(pdf, "scan", lambda _: "ocr") == ("ocr", STATUT_EXTRAIT)
+
+
+def test_rechercher_insensible_a_la_casse(dossier):
+    with ArchiveTextes(dossier) as archive:
+        archive.ajouter("rail", "Posez vos WAGONS sur le plateau", "h1")
+        archive.ajouter("catan", "Échangez du blé", "h2")
+        assert [nom for nom, _ in archive.rechercher("wagons")] == ["rail"]
+        assert [nom for nom, _ in archive.rechercher("ÉCHANGEZ")] == ["catan"]